@@ -1,39 +1,84 @@
+import asyncio
+import base64
+import calendar
+import hashlib
+import hmac
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
-from jose import JWTError, jwt
+import jwt
+import orjson
+from jwt import InvalidTokenError
 from passlib.context import CryptContext
 import bcrypt
+from argon2 import PasswordHasher
+from argon2.exceptions import InvalidHashError, VerificationError
+from cachetools import TLRUCache
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from config import settings
 from database import get_db
 from models import Student
 
-# Password hashing - use bcrypt directly to avoid passlib detection issues
+logger = logging.getLogger(__name__)
+
+# Password hashing - Argon2id for new hashes
+password_hasher = PasswordHasher(
+    time_cost=settings.ARGON2_TIME_COST,
+    memory_cost=settings.ARGON2_MEMORY_COST,
+    parallelism=settings.ARGON2_PARALLELISM
+)
+
+# Existing bcrypt hashes are still accepted on verify
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 # OAuth2 scheme - use token endpoint for Swagger UI compatibility
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_PREFIX}/auth/token")
 
+# Dedicated pool for password hashing so it never blocks the event loop
+# (argon2 and bcrypt release the GIL, so these threads run in parallel)
+_kdf_executor = ThreadPoolExecutor(max_workers=os.cpu_count(), thread_name_prefix="kdf")
+
+# HS256 signing context, keyed once so each token only hashes its own payload
+_hmac_template = hmac.new(settings.JWT_SECRET_KEY.encode('utf-8'), digestmod=hashlib.sha256)
+
+# Verified tokens -> (student_id, exp), keyed by a digest so raw tokens are
+# never kept; entries live for 30s at most and never past the token's exp
+TOKEN_CACHE_TTL = 30
+_token_cache = TLRUCache(
+    maxsize=10_000,
+    ttu=lambda key, value, now: min(now + TOKEN_CACHE_TTL, value[1]),
+    timer=time.time
+)
+
+
+def normalize_email(email: str) -> str:
+    """Normalize an email address for storage and lookup."""
+    return email.strip().lower()
 
-def _truncate_password(password: str) -> str:
-    """Truncate password to 72 bytes (bcrypt limit)."""
-    # Encode to bytes, truncate to 72 bytes, then decode back
-    password_bytes = password.encode('utf-8')
-    if len(password_bytes) > 72:
-        password_bytes = password_bytes[:72]
-    return password_bytes.decode('utf-8', errors='ignore')
+
+async def find_student_by_email(db: AsyncSession, email: str) -> Optional[Student]:
+    """Look up a student by email (case-insensitive, uses the lower(email) hash index)."""
+    return await db.scalar(
+        select(Student).where(func.lower(Student.email) == normalize_email(email))
+    )
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash using bcrypt directly."""
-    # Truncate password to match bcrypt's 72-byte limit
-    password_bytes = plain_password.encode('utf-8')
-    if len(password_bytes) > 72:
-        password_bytes = password_bytes[:72]
+    """Verify a password against its hash (Argon2id, or legacy bcrypt)."""
+    if hashed_password.startswith("$argon2"):
+        try:
+            return password_hasher.verify(hashed_password, plain_password)
+        except (VerificationError, InvalidHashError):
+            return False
     
-    # Use bcrypt directly
+    # Legacy bcrypt hashes: bcrypt only looks at the first 72 bytes
+    password_bytes = plain_password.encode('utf-8')[:72]
     try:
         return bcrypt.checkpw(password_bytes, hashed_password.encode('utf-8'))
     except Exception:
@@ -42,16 +87,41 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 
 def get_password_hash(password: str) -> str:
-    """Hash a password using bcrypt directly."""
-    # Truncate password to match bcrypt's 72-byte limit
-    password_bytes = password.encode('utf-8')
-    if len(password_bytes) > 72:
-        password_bytes = password_bytes[:72]
-    
-    # Use bcrypt directly to avoid passlib detection issues
-    salt = bcrypt.gensalt()
-    hashed = bcrypt.hashpw(password_bytes, salt)
-    return hashed.decode('utf-8')
+    """Hash a password using Argon2id."""
+    return password_hasher.hash(password)
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True for legacy bcrypt hashes or Argon2 hashes with outdated parameters."""
+    if not hashed_password.startswith("$argon2"):
+        return True
+    return password_hasher.check_needs_rehash(hashed_password)
+
+
+# Verified against when an email is unknown so login timing doesn't reveal
+# whether an account exists
+_DUMMY_PASSWORD_HASH = get_password_hash("dummy-password-for-timing")
+
+
+async def run_in_kdf_executor(func, *args):
+    """Run a blocking password hashing function in the KDF thread pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_kdf_executor, func, *args)
+
+
+def _b64url(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+_HS256_HEADER = _b64url(orjson.dumps({"alg": "HS256", "typ": "JWT"}))
+
+
+def _encode_hs256(payload: dict) -> str:
+    """Encode an HS256 JWT using the precomputed header and HMAC key context."""
+    signing_input = _HS256_HEADER + b"." + _b64url(orjson.dumps(payload))
+    mac = _hmac_template.copy()
+    mac.update(signing_input)
+    return (signing_input + b"." + _b64url(mac.digest())).decode('ascii')
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
@@ -63,6 +133,10 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
         expire = datetime.utcnow() + timedelta(hours=settings.JWT_EXPIRATION_HOURS)
     
     to_encode.update({"exp": expire, "role": "student"})
+    if settings.JWT_ALGORITHM == "HS256":
+        to_encode["exp"] = calendar.timegm(expire.utctimetuple())
+        return _encode_hs256(to_encode)
+    
     encoded_jwt = jwt.encode(
         to_encode, 
         settings.JWT_SECRET_KEY, 
@@ -71,19 +145,57 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
-def authenticate_student(email: str, password: str, db: Session) -> Optional[Student]:
+async def authenticate_student(email: str, password: str, db: AsyncSession) -> Optional[Student]:
     """Authenticate a student by email and password."""
-    student = db.query(Student).filter(Student.email == email).first()
+    student = await find_student_by_email(db, email)
     if not student:
+        await run_in_kdf_executor(verify_password, password, _DUMMY_PASSWORD_HASH)
         return None
-    if not verify_password(password, student.password_hash):
+    if not await run_in_kdf_executor(verify_password, password, student.password_hash):
         return None
+    
+    # Upgrade legacy bcrypt (or outdated Argon2) hashes while we have the plaintext
+    if password_needs_rehash(student.password_hash):
+        try:
+            student.password_hash = await run_in_kdf_executor(get_password_hash, password)
+            await db.commit()
+        except Exception as e:
+            # The login itself succeeded; try again next time
+            await db.rollback()
+            logger.warning(f"Could not upgrade password hash for student {student.id}: {str(e)}")
+    
     return student
 
 
+def _decode_token(token: str) -> Optional[dict]:
+    """Verify a JWT and return its claims, or None if it is invalid."""
+    try:
+        payload = jwt.decode(
+            token, 
+            settings.JWT_SECRET_KEY, 
+            algorithms=[settings.JWT_ALGORITHM]
+        )
+    except InvalidTokenError:
+        return None
+    
+    if payload.get("sub") is None:
+        return None
+    return payload
+
+
+async def _end_lookup_transaction(db: AsyncSession) -> None:
+    """Return the session's connection to the pool after the auth lookup.
+    
+    Otherwise it stays checked out until the request's dependencies are torn
+    down, including during slow non-DB work such as embedding calls. Commit
+    (not rollback) so the loaded student isn't expired; expire_on_commit is off.
+    """
+    await db.commit()
+
+
 async def get_current_student(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ) -> Student:
     """Get the current authenticated student from JWT token."""
     credentials_exception = HTTPException(
@@ -92,21 +204,23 @@ async def get_current_student(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    try:
-        payload = jwt.decode(
-            token, 
-            settings.JWT_SECRET_KEY, 
-            algorithms=[settings.JWT_ALGORITHM]
-        )
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-    except JWTError:
+    # Recently verified token: skip JWT verification and load by primary key
+    key = hashlib.sha256(token.encode('utf-8')).digest()
+    cached = _token_cache.get(key)
+    if cached is not None:
+        student = await db.get(Student, cached[0])
+        if student is not None:
+            await _end_lookup_transaction(db)
+            return student
+    
+    payload = _decode_token(token)
+    if payload is None:
         raise credentials_exception
     
-    student = db.query(Student).filter(Student.email == email).first()
+    student = await db.scalar(select(Student).where(Student.email == payload["sub"]))
     if student is None:
         raise credentials_exception
     
+    _token_cache[key] = (student.id, payload["exp"])
+    await _end_lookup_transaction(db)
     return student
-
@@ -10,17 +10,35 @@ class Settings(BaseSettings):
     POSTGRES_USER: str = "student"
     POSTGRES_PASSWORD: str = "secure_password_123"
     
+    # Connections all backend workers may open together (Postgres defaults to
+    # max_connections=100; the rest is left for n8n, pgAdmin and psql)
+    DB_MAX_CONNECTIONS: int = 60
+    # Processes sharing DB_MAX_CONNECTIONS; gunicorn_conf.py exports its worker
+    # count here, a single uvicorn process (docker-compose dev) uses the default
+    WEB_CONCURRENCY: int = 1
+    
     # OpenAI
     OPENAI_API_KEY: str
     EMBEDDING_MODEL: str = "text-embedding-ada-002"
     OPENAI_MODEL: str = "gpt-4"
     OPENAI_TEMPERATURE: float = 0.7
     
+    # Local sentence-transformers model used instead of the OpenAI embeddings API
+    # (sources and queries alike). Its output size must equal VECTOR_DIMENSION;
+    # the n8n workflow still embeds with OpenAI, so only enable this without it.
+    USE_LOCAL_EMBEDDING: bool = False
+    LOCAL_EMBEDDING_MODEL: Optional[str] = None
+    
     # JWT
     JWT_SECRET_KEY: str = "academic-helper-jwt-secret-key-2024"
     JWT_ALGORITHM: str = "HS256"
     JWT_EXPIRATION_HOURS: int = 24
     
+    # Password hashing (Argon2id, OWASP defaults; lower for tests/dev)
+    ARGON2_TIME_COST: int = 2
+    ARGON2_MEMORY_COST: int = 19456  # KiB
+    ARGON2_PARALLELISM: int = 1
+    
     # FastAPI
     FASTAPI_HOST: str = "0.0.0.0"
     FASTAPI_PORT: int = 8000
@@ -31,6 +49,17 @@ class Settings(BaseSettings):
     # Called after student reviews results and confirms sending to instructor
     N8N_TEACHER_WEBHOOK_URL: str = "https://nati111.app.n8n.cloud/webhook/teacher-notify"
     
+    # Raw uploads waiting for background text extraction
+    UPLOAD_DIR: str = "/app/uploads"
+    
+    # Object storage for extracted assignment text (S3/MinIO); when unset the
+    # text is stored in the assignments table
+    ASSIGNMENT_TEXT_BUCKET: Optional[str] = None
+    S3_ENDPOINT_URL: Optional[str] = None
+    
+    # Shared embedding cache (Redis); disabled when unset
+    REDIS_URL: Optional[str] = None
+    
     # Notifications
     TEACHER_EMAIL: str = "instructor@example.com"
     
@@ -45,6 +74,10 @@ class Settings(BaseSettings):
     def database_url(self) -> str:
         return f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
     
+    @property
+    def async_database_url(self) -> str:
+        return f"postgresql+asyncpg://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_HOST}:{self.POSTGRES_PORT}/{self.POSTGRES_DB}"
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -1,28 +1,77 @@
-from sqlalchemy import create_engine
+from pgvector.psycopg2 import register_vector
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from config import settings
 
-# Create database engine
+# Each process (gunicorn worker) gets an equal share of DB_MAX_CONNECTIONS,
+# split between the sync and async engines (pool_size + max_overflow each),
+# so all processes at full load never exceed the budget
+_WORKERS = max(settings.WEB_CONCURRENCY, 1)
+_ENGINE_CONNECTIONS = settings.DB_MAX_CONNECTIONS // _WORKERS // 2
+if _ENGINE_CONNECTIONS < 1:
+    raise Exception(
+        f"DB_MAX_CONNECTIONS={settings.DB_MAX_CONNECTIONS} is too small for "
+        f"{_WORKERS} workers (each needs at least 2 connections)"
+    )
+_POOL_SIZE = (_ENGINE_CONNECTIONS + 1) // 2
+_MAX_OVERFLOW = _ENGINE_CONNECTIONS - _POOL_SIZE
+
+# Create database engine (sync: schema creation and the pgvector search path,
+# which works on the raw psycopg2 connection). Sync sessions are used from
+# Starlette's threadpool; threads beyond the pool wait up to pool_timeout for
+# a connection rather than opening more.
 engine = create_engine(
     settings.database_url,
     pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20
+    pool_size=_POOL_SIZE,
+    max_overflow=_MAX_OVERFLOW,
+    pool_recycle=3600
 )
 
+
+# Register the pgvector types once per new DBAPI connection instead of on
+# every search
+@event.listens_for(engine, "connect")
+def _register_vector(dbapi_connection, connection_record):
+    register_vector(dbapi_connection)
+
+
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine (asyncpg) used by the request handlers so DB I/O never
+# blocks the event loop
+async_engine = create_async_engine(
+    settings.async_database_url,
+    pool_pre_ping=True,
+    pool_size=_POOL_SIZE,
+    max_overflow=_MAX_OVERFLOW,
+    pool_recycle=3600
+)
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
 # Base class for models
 Base = declarative_base()
 
 
 # Dependency to get database session
-def get_db():
+async def get_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# Dependency to get a sync database session (run in the threadpool by FastAPI)
+def get_sync_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
-
@@ -1,52 +1,87 @@
+import asyncio
+import hashlib
 import os
-from typing import Optional
+import threading
+import uuid
+from typing import BinaryIO, Optional, Tuple
 from fastapi import UploadFile
-import PyPDF2
+import pypdfium2 as pdfium
 from docx import Document
 import aiofiles
 
+# Read uploads in 1MB chunks
+UPLOAD_CHUNK_SIZE = 1 << 20
 
-async def extract_text_from_file(file: UploadFile) -> str:
-    """Extract text from uploaded file (PDF or DOCX)."""
-    # Save file temporarily
+# PDFium is not thread-safe, so only one thread may drive it at a time
+_pdfium_lock = threading.Lock()
+
+async def save_upload(file: UploadFile, upload_dir: str) -> Tuple[str, str]:
+    """Stream an uploaded file to disk in chunks.
+    
+    The SHA-256 of the content is computed in the same pass, so the file is
+    never held in memory in full. Returns (saved path, hex digest).
+    """
+    os.makedirs(upload_dir, exist_ok=True)
     file_extension = os.path.splitext(file.filename)[1].lower()
+    path = os.path.join(upload_dir, f"{uuid.uuid4().hex}{file_extension}")
     
-    # Read file content
-    content = await file.read()
+    digest = hashlib.sha256()
+    async with aiofiles.open(path, 'wb') as out:
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            digest.update(chunk)
+            await out.write(chunk)
+    
+    return path, digest.hexdigest()
+
+
+async def extract_text_from_file(path: str) -> Tuple[str, int]:
+    """Extract text from a saved upload (PDF or DOCX).
     
+    Returns (text, word count).
+    """
     try:
+        # Parsing and counting are CPU-bound; run them off the event loop
+        return await asyncio.to_thread(_extract_text_from_path, path)
+    except Exception as e:
+        raise Exception(f"Error extracting text from file: {str(e)}")
+
+
+def _extract_text_from_path(path: str) -> Tuple[str, int]:
+    file_extension = os.path.splitext(path)[1].lower()
+    with open(path, 'rb') as f:
         if file_extension == '.pdf':
-            return extract_text_from_pdf(content)
+            text = extract_text_from_pdf(f)
         elif file_extension in ['.docx', '.doc']:
-            return extract_text_from_docx(content)
+            text = extract_text_from_docx(f)
         else:
             # Try to read as plain text
-            return content.decode('utf-8', errors='ignore')
-    except Exception as e:
-        raise Exception(f"Error extracting text from file: {str(e)}")
+            text = f.read().decode('utf-8', errors='ignore')
+    return text, count_words(text)
 
 
-def extract_text_from_pdf(pdf_content: bytes) -> str:
-    """Extract text from PDF file."""
+def extract_text_from_pdf(pdf_file: BinaryIO) -> str:
+    """Extract text from PDF file using PDFium."""
     try:
-        from io import BytesIO
-        pdf_file = BytesIO(pdf_content)
-        pdf_reader = PyPDF2.PdfReader(pdf_file)
+        with _pdfium_lock:
+            pdf = pdfium.PdfDocument(pdf_file)
+            try:
+                pages_text = []
+                for page in pdf:
+                    textpage = page.get_textpage()
+                    pages_text.append(textpage.get_text_range())
+                    textpage.close()
+                    page.close()
+            finally:
+                pdf.close()
         
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text() + "\n"
-        
-        return text.strip()
+        return "\n".join(pages_text).strip()
     except Exception as e:
         raise Exception(f"Error reading PDF: {str(e)}")
 
 
-def extract_text_from_docx(docx_content: bytes) -> str:
+def extract_text_from_docx(docx_file: BinaryIO) -> str:
     """Extract text from DOCX file."""
     try:
-        from io import BytesIO
-        docx_file = BytesIO(docx_content)
         doc = Document(docx_file)
         
         text = ""
@@ -61,4 +96,3 @@ def extract_text_from_docx(docx_content: bytes) -> str:
 def count_words(text: str) -> int:
     """Count words in text."""
     return len(text.split())
-
@@ -0,0 +1,26 @@
+import os
+
+# Gunicorn settings for production: run `gunicorn -c gunicorn_conf.py main:app`
+
+bind = f"{os.getenv('FASTAPI_HOST', '0.0.0.0')}:{os.getenv('FASTAPI_PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", (os.cpu_count() or 2) * 2 + 1))
+# Every worker needs at least one connection per engine (see database.py)
+workers = min(workers, int(os.getenv("DB_MAX_CONNECTIONS", 60)) // 2)
+# The app (loaded after this file, see preload_app) divides its DB
+# connection budget by the real worker count
+os.environ["WEB_CONCURRENCY"] = str(workers)
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# Import the app (models, RAG/PDF libraries, create_all) once in the master
+# and fork workers from it so they share those pages copy-on-write
+preload_app = True
+
+loglevel = os.getenv("LOG_LEVEL", "info").lower()
+accesslog = "-"
+
+
+def post_fork(server, worker):
+    # Connections opened by the master during preload must not be shared
+    # across processes; drop them so each worker opens its own
+    from database import engine
+    engine.dispose(close=False)
@@ -1,32 +1,42 @@
-from fastapi import FastAPI, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi import FastAPI, BackgroundTasks, Depends, HTTPException, Query, Request, Response, status, UploadFile, File, Form
 from fastapi.security import OAuth2PasswordRequestForm
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import Optional
+import asyncio
+import hashlib
 import httpx
 import os
 import logging
-from datetime import timedelta
+from datetime import datetime, timedelta
 
 from config import settings
-from database import get_db, Base, engine
+from database import get_db, get_sync_db, Base, engine, AsyncSessionLocal
 from models import Student, Assignment, AnalysisResult
 from auth import (
     authenticate_student,
     create_access_token,
+    find_student_by_email,
     get_current_student,
+    normalize_email,
     get_password_hash,
+    run_in_kdf_executor,
     verify_password
 )
-from file_processor import extract_text_from_file, count_words
-from rag_service import search_similar_sources
+from file_processor import save_upload, extract_text_from_file
+from rag_service import hydrate_sources, search_similar_sources
+from storage import store_assignment_text
 
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
+logger = logging.getLogger(__name__)
 
 # Create database tables
 Base.metadata.create_all(bind=engine)
@@ -35,10 +45,15 @@ Base.metadata.create_all(bind=engine)
 app = FastAPI(
     title="Academic Assignment Helper & Plagiarism Detector",
     description="RAG-powered system for assignment analysis and plagiarism detection",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse
 )
 
-# CORS middleware
+# CORS middleware (pure ASGI). Middleware added later wraps it, so keep CORS
+# as the last add_middleware call to answer preflights before anything else
+# runs. New middleware should be plain ASGI classes (__call__(scope, receive,
+# send)) rather than BaseHTTPMiddleware, which allocates Request/Response
+# objects and an extra task per request.
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -48,20 +63,40 @@ app.add_middleware(
 )
 
 
+# Shared HTTP client for outbound webhook calls (keeps connections alive)
+@app.on_event("startup")
+async def startup_http_client():
+    app.state.http_client = httpx.AsyncClient(
+        timeout=30.0,
+        limits=httpx.Limits(max_connections=64, max_keepalive_connections=32)
+    )
+
+
+@app.on_event("shutdown")
+async def shutdown_http_client():
+    await app.state.http_client.aclose()
+
+
 # Pydantic schemas
-from pydantic import BaseModel, EmailStr
-from typing import List, Dict, Any
+from pydantic import BaseModel, ConfigDict, EmailStr, StringConstraints
+from typing import Annotated, List, Dict, Any
+
+
+# Shape-only email check; the pattern is compiled once by pydantic-core's
+# Rust regex engine (a linear-time DFA, no backtracking)
+LoginEmail = Annotated[str, StringConstraints(max_length=254, pattern=r"^[^@\s]+@[^@\s]+\.[^@\s]+$")]
 
 
 class StudentRegister(BaseModel):
     email: EmailStr
-    password: str  # Will be truncated to 72 bytes if longer (bcrypt limit)
+    password: str
     full_name: Optional[str] = None
     student_id: Optional[str] = None
 
 
 class StudentLogin(BaseModel):
-    email: EmailStr
+    # Full EmailStr validation already happened at registration
+    email: LoginEmail
     password: str
 
 
@@ -85,6 +120,8 @@ class MessageResponse(BaseModel):
 
 
 class AnalysisResponse(BaseModel):
+    model_config = ConfigDict(frozen=True, from_attributes=True)
+    
     id: int
     assignment_id: int
     original_summary: Optional[str]
@@ -94,27 +131,32 @@ class AnalysisResponse(BaseModel):
     research_suggestions: Optional[str]
     citation_recommendations: Optional[str]
     confidence_score: Optional[float]
-    analyzed_at: str
+    analyzed_at: Optional[datetime]
 
 
 class SourceResponse(BaseModel):
+    model_config = ConfigDict(frozen=True, from_attributes=True)
+    
     id: int
     title: str
-    authors: Optional[str]
-    publication_year: Optional[int]
-    abstract: Optional[str]
-    source_type: Optional[str]
-    url: Optional[str]
+    # Omitted when /sources is called with details=false
+    authors: Optional[str] = None
+    publication_year: Optional[int] = None
+    abstract: Optional[str] = None
+    source_type: Optional[str] = None
+    url: Optional[str] = None
     relevance: Optional[str]
     similarity: Optional[float]
 
 
 # Authentication endpoints
 @app.post(f"{settings.API_V1_PREFIX}/auth/register", response_model=TokenResponse)
-async def register(student_data: StudentRegister, db: Session = Depends(get_db)):
+async def register(student_data: StudentRegister, db: AsyncSession = Depends(get_db)):
     """Register a new student account."""
+    email = normalize_email(student_data.email)
+    
     # Check if email already exists
-    existing_student = db.query(Student).filter(Student.email == student_data.email).first()
+    existing_student = await find_student_by_email(db, email)
     if existing_student:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -123,7 +165,9 @@ async def register(student_data: StudentRegister, db: Session = Depends(get_db))
     
     # Check if student_id already exists (if provided)
     if student_data.student_id:
-        existing_student_id = db.query(Student).filter(Student.student_id == student_data.student_id).first()
+        existing_student_id = await db.scalar(
+            select(Student).where(Student.student_id == student_data.student_id)
+        )
         if existing_student_id:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -133,15 +177,15 @@ async def register(student_data: StudentRegister, db: Session = Depends(get_db))
     try:
         # Create new student
         student = Student(
-            email=student_data.email,
-            password_hash=get_password_hash(student_data.password),
+            email=email,
+            password_hash=await run_in_kdf_executor(get_password_hash, student_data.password),
             full_name=student_data.full_name,
             student_id=student_data.student_id
         )
         
         db.add(student)
-        db.commit()
-        db.refresh(student)
+        await db.commit()
+        await db.refresh(student)
         
         # Create access token
         access_token = create_access_token(data={"sub": student.email})
@@ -149,7 +193,7 @@ async def register(student_data: StudentRegister, db: Session = Depends(get_db))
         return TokenResponse(access_token=access_token)
     
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         # Handle database integrity errors
         error_str = str(e).lower()
         if "unique" in error_str or "duplicate" in error_str:
@@ -176,9 +220,9 @@ async def register(student_data: StudentRegister, db: Session = Depends(get_db))
 
 
 @app.post(f"{settings.API_V1_PREFIX}/auth/login", response_model=TokenResponse)
-async def login(credentials: StudentLogin, db: Session = Depends(get_db)):
+async def login(credentials: StudentLogin, db: AsyncSession = Depends(get_db)):
     """Login and get JWT token."""
-    student = authenticate_student(credentials.email, credentials.password, db)
+    student = await authenticate_student(credentials.email, credentials.password, db)
     if not student:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -194,11 +238,11 @@ async def login(credentials: StudentLogin, db: Session = Depends(get_db)):
 @app.post(f"{settings.API_V1_PREFIX}/auth/token", response_model=TokenResponse)
 async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """OAuth2-compatible token endpoint for Swagger UI authorization.
     Uses 'username' field for email address."""
-    student = authenticate_student(form_data.username, form_data.password, db)
+    student = await authenticate_student(form_data.username, form_data.password, db)
     if not student:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -212,10 +256,10 @@ async def login_for_access_token(
 
 # Password reset endpoint (for forgotten passwords)
 @app.post(f"{settings.API_V1_PREFIX}/auth/reset-password", response_model=MessageResponse)
-async def reset_password(reset_data: PasswordReset, db: Session = Depends(get_db)):
+async def reset_password(reset_data: PasswordReset, db: AsyncSession = Depends(get_db)):
     """Reset password for a student account (for forgotten passwords).
     Note: In production, this should require email verification or other security measures."""
-    student = db.query(Student).filter(Student.email == reset_data.email).first()
+    student = await find_student_by_email(db, reset_data.email)
     if not student:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -231,13 +275,13 @@ async def reset_password(reset_data: PasswordReset, db: Session = Depends(get_db
     
     try:
         # Update password
-        student.password_hash = get_password_hash(reset_data.new_password)
-        db.commit()
-        db.refresh(student)
+        student.password_hash = await run_in_kdf_executor(get_password_hash, reset_data.new_password)
+        await db.commit()
+        await db.refresh(student)
         
         return MessageResponse(message="Password reset successfully")
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error resetting password: {str(e)}"
@@ -249,11 +293,11 @@ async def reset_password(reset_data: PasswordReset, db: Session = Depends(get_db
 async def change_password(
     password_data: PasswordChange,
     current_student: Student = Depends(get_current_student),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Change password for logged-in user (requires old password verification)."""
     # Verify old password
-    if not verify_password(password_data.old_password, current_student.password_hash):
+    if not await run_in_kdf_executor(verify_password, password_data.old_password, current_student.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect current password"
@@ -267,7 +311,7 @@ async def change_password(
         )
     
     # Check if new password is different from old password
-    if verify_password(password_data.new_password, current_student.password_hash):
+    if await run_in_kdf_executor(verify_password, password_data.new_password, current_student.password_hash):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="New password must be different from current password"
@@ -275,76 +319,164 @@ async def change_password(
     
     try:
         # Update password
-        current_student.password_hash = get_password_hash(password_data.new_password)
-        db.commit()
-        db.refresh(current_student)
+        current_student.password_hash = await run_in_kdf_executor(get_password_hash, password_data.new_password)
+        await db.commit()
+        await db.refresh(current_student)
         
         return MessageResponse(message="Password changed successfully")
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Error changing password: {str(e)}"
         )
 
 
+async def _notify_n8n(webhook_data: dict):
+    """Send assignment data to the n8n analysis webhook, logging any failure."""
+    try:
+        response = await app.state.http_client.post(
+            settings.N8N_WEBHOOK_URL,
+            json=webhook_data
+        )
+        response.raise_for_status()
+        print(f"✅ Successfully called n8n webhook: {settings.N8N_WEBHOOK_URL}")
+    except httpx.HTTPStatusError as e:
+        # Log detailed error; the assignment itself is stored
+        print(f"❌ Error calling n8n webhook: HTTP {e.response.status_code} - {e.response.text}")
+        print(f"   URL: {settings.N8N_WEBHOOK_URL}")
+    except Exception as e:
+        # Log error; the assignment itself is stored
+        print(f"❌ Error calling n8n webhook: {str(e)}")
+        print(f"   URL: {settings.N8N_WEBHOOK_URL}")
+
+
+# Strong references to in-flight webhook tasks so they aren't garbage collected
+_webhook_tasks = set()
+
+
+async def _update_assignment(assignment_id: int, **values):
+    """Write assignment columns in a short transaction of its own."""
+    async with AsyncSessionLocal() as db:
+        await db.execute(update(Assignment).where(Assignment.id == assignment_id).values(**values))
+        await db.commit()
+
+
+async def _process_assignment(assignment_id: int, upload_path: str):
+    """Extract text from a saved upload, store it, and trigger n8n analysis.
+    
+    Runs as a background task after the upload response has been sent. No
+    database connection is held during extraction and upload to storage.
+    """
+    try:
+        async with AsyncSessionLocal() as db:
+            assignment = (await db.execute(
+                select(Assignment.student_id, Assignment.filename, Student.email).join(
+                    Student, Student.id == Assignment.student_id
+                ).where(Assignment.id == assignment_id)
+            )).first()
+        if not assignment:
+            return
+        
+        try:
+            # Extract text from file
+            text_content, word_count = await extract_text_from_file(upload_path)
+            
+            # Offload the text to object storage when configured
+            text_digest, text_key = await store_assignment_text(text_content)
+        except Exception:
+            logger.exception(f"Error processing assignment {assignment_id}")
+            await _update_assignment(assignment_id, status="failed")
+            return
+    finally:
+        try:
+            os.remove(upload_path)
+        except OSError:
+            pass
+    
+    await _update_assignment(
+        assignment_id,
+        original_text=None if text_key else text_content,
+        text_sha256=text_digest,
+        text_s3_key=text_key,
+        word_count=word_count,
+        status="analyzing"
+    )
+    
+    # Prepare data for n8n webhook
+    webhook_data = {
+        "student_id": str(assignment.student_id),
+        "student_email": assignment.email,
+        "teacher_email": settings.TEACHER_EMAIL,
+        "assignment_id": assignment_id,
+        "filename": assignment.filename,
+        "assignmentText": text_content
+    }
+    
+    # Fire and forget: n8n may take up to 30s to answer, and nothing here
+    # depends on its response
+    task = asyncio.create_task(_notify_n8n(webhook_data))
+    _webhook_tasks.add(task)
+    task.add_done_callback(_webhook_tasks.discard)
+
+
 # Assignment upload endpoint
 @app.post(f"{settings.API_V1_PREFIX}/upload")
 async def upload_assignment(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     current_student: Student = Depends(get_current_student),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    """Upload assignment file and trigger n8n analysis."""
+    """Upload assignment file; text extraction and n8n analysis run in the background."""
     try:
-        # Extract text from file
-        text_content = await extract_text_from_file(file)
-        word_count = count_words(text_content)
+        # Save the raw file; extraction happens after the response is sent
+        upload_path, content_digest = await save_upload(file, settings.UPLOAD_DIR)
+        
+        # Same file uploaded again by this student: reuse the existing assignment
+        # and its analysis instead of running the pipeline again
+        existing_id = await db.scalar(
+            select(Assignment.id).where(
+                Assignment.student_id == current_student.id,
+                Assignment.content_sha256 == content_digest,
+                Assignment.status != "failed"
+            ).order_by(Assignment.id.desc()).limit(1)
+        )
+        if existing_id is not None:
+            os.remove(upload_path)
+            return {
+                "message": "Assignment already uploaded",
+                "assignment_id": existing_id,
+                "filename": file.filename,
+                "status": "Duplicate of an earlier upload"
+            }
         
         # Save assignment to database
         assignment = Assignment(
             student_id=current_student.id,
             filename=file.filename,
-            original_text=text_content,
-            word_count=word_count
+            content_sha256=content_digest,
+            status="pending"
         )
         db.add(assignment)
-        db.commit()
-        db.refresh(assignment)
-        
-        # Prepare data for n8n webhook
-        webhook_data = {
-            "student_id": str(current_student.id),
-            "student_email": current_student.email,
-            "teacher_email": settings.TEACHER_EMAIL,
-            "assignment_id": assignment.id,
-            "filename": file.filename,
-            "assignmentText": text_content
-        }
-        
-        # Call n8n webhook
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    settings.N8N_WEBHOOK_URL,
-                    json=webhook_data
-                )
-                response.raise_for_status()
-                print(f"✅ Successfully called n8n webhook: {settings.N8N_WEBHOOK_URL}")
-        except httpx.HTTPStatusError as e:
-            # Log detailed error but don't fail the upload
-            print(f"❌ Error calling n8n webhook: HTTP {e.response.status_code} - {e.response.text}")
-            print(f"   URL: {settings.N8N_WEBHOOK_URL}")
-        except Exception as e:
-            # Log error but don't fail the upload
-            print(f"❌ Error calling n8n webhook: {str(e)}")
-            print(f"   URL: {settings.N8N_WEBHOOK_URL}")
+            # expire_on_commit=False keeps assignment.id loaded, and no refresh
+            # means the request's connection is released before the background task
+            await db.commit()
+        except Exception:
+            # Nothing will process the saved file
+            try:
+                os.remove(upload_path)
+            except OSError:
+                pass
+            raise
+        
+        background_tasks.add_task(_process_assignment, assignment.id, upload_path)
         
         return {
             "message": "Assignment uploaded successfully",
             "assignment_id": assignment.id,
             "filename": file.filename,
-            "word_count": word_count,
             "status": "Analysis in progress"
         }
     
@@ -355,15 +487,55 @@ async def upload_assignment(
         )
 
 
+# Only the columns AnalysisResponse needs; selecting them directly skips
+# ORM entity hydration and identity-map bookkeeping
+ANALYSIS_COLUMNS = (
+    AnalysisResult.id,
+    AnalysisResult.assignment_id,
+    AnalysisResult.original_summary,
+    AnalysisResult.suggested_sources,
+    AnalysisResult.plagiarism_score,
+    AnalysisResult.flagged_sections,
+    AnalysisResult.research_suggestions,
+    AnalysisResult.citation_recommendations,
+    AnalysisResult.confidence_score,
+    AnalysisResult.analyzed_at
+)
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    """Check the request's If-None-Match header against an ETag."""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    return etag in [tag.strip() for tag in if_none_match.split(",")] or if_none_match.strip() == "*"
+
+
+def _analysis_response(row) -> AnalysisResponse:
+    """Build an AnalysisResponse from a row selected with ANALYSIS_COLUMNS."""
+    return AnalysisResponse.model_validate(row)
+
+
 # Get analysis results by analysis ID (required endpoint)
 @app.get(f"{settings.API_V1_PREFIX}/analysis/{{analysis_id}}", response_model=AnalysisResponse)
 async def get_analysis(
     analysis_id: int,
+    request: Request,
+    response: Response,
     current_student: Student = Depends(get_current_student),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Retrieve analysis results by analysis ID."""
-    analysis = db.query(AnalysisResult).filter(AnalysisResult.id == analysis_id).first()
+    # Fetch the analysis and check ownership in a single query; analyses that
+    # belong to other students are reported as not found
+    analysis = (await db.execute(
+        select(*ANALYSIS_COLUMNS).join(
+            Assignment, Assignment.id == AnalysisResult.assignment_id
+        ).where(
+            AnalysisResult.id == analysis_id,
+            Assignment.student_id == current_student.id
+        )
+    )).first()
     
     if not analysis:
         raise HTTPException(
@@ -371,26 +543,15 @@ async def get_analysis(
             detail="Analysis not found"
         )
     
-    # Verify the assignment belongs to the current student
-    assignment = db.query(Assignment).filter(Assignment.id == analysis.assignment_id).first()
-    if not assignment or assignment.student_id != current_student.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Access denied"
-        )
+    # Analyses are written once by n8n, so id + timestamp identify the content
+    analyzed_ts = int(analysis.analyzed_at.timestamp()) if analysis.analyzed_at else 0
+    etag = f'"{analysis.id}-{analyzed_ts}"'
+    cache_headers = {"ETag": etag, "Cache-Control": "private, max-age=300, must-revalidate"}
+    if _etag_matches(request, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers)
     
-    return AnalysisResponse(
-        id=analysis.id,
-        assignment_id=analysis.assignment_id,
-        original_summary=analysis.original_summary,
-        suggested_sources=analysis.suggested_sources,
-        plagiarism_score=analysis.plagiarism_score,
-        flagged_sections=analysis.flagged_sections,
-        research_suggestions=analysis.research_suggestions,
-        citation_recommendations=analysis.citation_recommendations,
-        confidence_score=analysis.confidence_score,
-        analyzed_at=analysis.analyzed_at.isoformat() if analysis.analyzed_at else None
-    )
+    response.headers.update(cache_headers)
+    return _analysis_response(analysis)
 
 
 # Get analysis results by assignment ID (more convenient)
@@ -398,76 +559,101 @@ async def get_analysis(
 async def get_analysis_by_assignment(
     assignment_id: int,
     current_student: Student = Depends(get_current_student),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """Retrieve analysis results for an assignment by assignment_id.
     
     This endpoint is more convenient than using analysis_id since you get assignment_id
     immediately after uploading. The analysis is created by the n8n workflow.
     """
-    # Verify the assignment belongs to the current student
-    assignment = db.query(Assignment).filter(Assignment.id == assignment_id).first()
-    if not assignment:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Assignment not found"
-        )
-    
-    if assignment.student_id != current_student.id:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Access denied"
-        )
-    
-    # Get the latest analysis for this assignment (n8n may create multiple, get most recent)
-    analysis = db.query(AnalysisResult).filter(
-        AnalysisResult.assignment_id == assignment_id
-    ).order_by(AnalysisResult.analyzed_at.desc()).first()
+    # Get the latest analysis for this assignment (n8n may create multiple, get most recent),
+    # checking ownership in the same query; assignments of other students look missing
+    analysis = (await db.execute(
+        select(*ANALYSIS_COLUMNS).join(
+            Assignment, Assignment.id == AnalysisResult.assignment_id
+        ).where(
+            AnalysisResult.assignment_id == assignment_id,
+            Assignment.student_id == current_student.id
+        ).order_by(AnalysisResult.analyzed_at.desc()).limit(1)
+    )).first()
     
     if not analysis:
+        assignment_status = await db.scalar(
+            select(Assignment.status).where(
+                Assignment.id == assignment_id,
+                Assignment.student_id == current_student.id
+            )
+        )
+        if assignment_status is None:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail="Assignment not found"
+            )
+        if assignment_status == "failed":
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Text could not be extracted from this assignment. Please check the file and upload it again."
+            )
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Analysis not found. The assignment may still be processing. Please wait a few moments and try again."
         )
     
-    return AnalysisResponse(
-        id=analysis.id,
-        assignment_id=analysis.assignment_id,
-        original_summary=analysis.original_summary,
-        suggested_sources=analysis.suggested_sources,
-        plagiarism_score=analysis.plagiarism_score,
-        flagged_sections=analysis.flagged_sections,
-        research_suggestions=analysis.research_suggestions,
-        citation_recommendations=analysis.citation_recommendations,
-        confidence_score=analysis.confidence_score,
-        analyzed_at=analysis.analyzed_at.isoformat() if analysis.analyzed_at else None
-    )
+    return _analysis_response(analysis)
 
 
 # RAG source search endpoint
-@app.get(f"{settings.API_V1_PREFIX}/sources", response_model=List[SourceResponse])
+# The search results are already plain dicts in the SourceResponse shape, so they
+# are serialized directly with orjson; `responses` keeps the schema in the docs.
+# With details=false only id, title and scores are returned and the second
+# (detail) query is skipped.
+@app.get(
+    f"{settings.API_V1_PREFIX}/sources",
+    response_model=None,
+    responses={200: {"model": List[SourceResponse]}}
+)
 async def search_sources(
+    request: Request,
     query: str,
-    top_k: int = 5,
+    top_k: int = Query(5, ge=1, le=100),
+    details: bool = True,
+    min_year: Optional[int] = None,
+    source_type: Optional[str] = None,
     current_student: Student = Depends(get_current_student),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_sync_db)
 ):
     """Search academic sources via RAG."""
-    import logging
-    logger = logging.getLogger(__name__)
+    debug = logger.isEnabledFor(logging.DEBUG)
     
     try:
-        # Log the received query to verify it's different for each request
-        logger.info(f"API endpoint received query: '{query}' (top_k={top_k})")
+        if debug:
+            logger.debug("API endpoint received query: %r (top_k=%d)", query, top_k)
+        
+        # The pgvector search uses the sync psycopg2 connection; keep it off the event loop
+        sources = await run_in_threadpool(
+            search_similar_sources, db, query,
+            top_k=top_k, min_year=min_year, source_type=source_type
+        )
+        if details and sources:
+            details_by_id = await run_in_threadpool(hydrate_sources, db, [s["id"] for s in sources])
+            sources = [{**s, **details_by_id.get(s["id"], {})} for s in sources]
         
-        sources = search_similar_sources(db, query, top_k=top_k)
+        if debug:
+            logger.debug("API endpoint returning %d sources for query: %r", len(sources), query)
+            if sources:
+                logger.debug(
+                    "Top result: %.50s... (similarity: %.4f)",
+                    sources[0].get("title", "N/A"), sources[0].get("similarity", 0)
+                )
         
-        # Log the results
-        logger.info(f"API endpoint returning {len(sources)} sources for query: '{query}'")
-        if sources:
-            logger.info(f"Top result: {sources[0].get('title', 'N/A')[:50]}... (similarity: {sources[0].get('similarity', 0):.4f})")
+        # ETag over the result ids and scores; a match skips serializing the body
+        fingerprint = f"{details};" + ",".join(f"{s['id']}:{s['similarity']:.6f}" for s in sources)
+        etag = f'"{hashlib.blake2b(fingerprint.encode(), digest_size=16).hexdigest()}"'
+        cache_headers = {"ETag": etag, "Cache-Control": "private, max-age=60"}
+        if _etag_matches(request, etag):
+            return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers)
         
-        return [SourceResponse(**source) for source in sources]
+        return ORJSONResponse(sources, headers=cache_headers)
     except Exception as e:
         logger.error(f"Error in search_sources endpoint: {str(e)}", exc_info=True)
         raise HTTPException(
@@ -1,8 +1,8 @@
-from sqlalchemy import Column, Integer, String, Text, Float, TIMESTAMP, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Text, Float, TIMESTAMP, ForeignKey, JSON, Index
 from sqlalchemy.dialects.postgresql import JSONB
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.sql import func
-from pgvector.sqlalchemy import Vector
+from pgvector.sqlalchemy import HALFVEC
 from database import Base
 
 
@@ -17,6 +17,10 @@ class Student(Base):
     created_at = Column(TIMESTAMP, server_default=func.now())
     
     assignments = relationship("Assignment", back_populates="student", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        Index("students_email_lower_idx", func.lower(email), postgresql_using="hash"),
+    )
 
 
 class Assignment(Base):
@@ -25,10 +29,15 @@ class Assignment(Base):
     id = Column(Integer, primary_key=True, index=True)
     student_id = Column(Integer, ForeignKey("students.id", ondelete="CASCADE"), index=True)
     filename = Column(String, nullable=False)
-    original_text = Column(Text)
+    # Large text is only loaded on access; NULL when stored in object storage
+    original_text = deferred(Column(Text))
+    text_sha256 = Column(String(64), index=True)
+    text_s3_key = Column(String)
+    content_sha256 = Column(String(64), index=True)  # SHA-256 of the uploaded file
     topic = Column(String)
     academic_level = Column(String)
     word_count = Column(Integer)
+    status = Column(String, server_default="pending")  # 'pending', 'analyzing', 'failed'
     uploaded_at = Column(TIMESTAMP, server_default=func.now())
     
     student = relationship("Student", back_populates="assignments")
@@ -50,6 +59,11 @@ class AnalysisResult(Base):
     analyzed_at = Column(TIMESTAMP, server_default=func.now())
     
     assignment = relationship("Assignment", back_populates="analysis_results")
+    
+    # Serves "latest analysis for an assignment" (ORDER BY analyzed_at DESC LIMIT 1) without a sort
+    __table_args__ = (
+        Index("analysis_results_assignment_analyzed_idx", assignment_id, analyzed_at.desc()),
+    )
 
 
 class AcademicSource(Base):
@@ -63,6 +77,12 @@ class AcademicSource(Base):
     full_text = Column(Text)
     source_type = Column(String)  # 'paper', 'textbook', 'course_material'
     url = Column(String)
-    embedding = Column(Vector(1536))
+    embedding = Column(HALFVEC(1536))  # FP16: half the storage/bandwidth of vector(1536)
     created_at = Column(TIMESTAMP, server_default=func.now())
+    
+    # Metadata filters of the source search
+    __table_args__ = (
+        Index("academic_sources_publication_year_idx", publication_year),
+        Index("academic_sources_source_type_idx", source_type),
+    )
 
@@ -1,41 +1,430 @@
 from typing import List, Dict, Optional
+from functools import lru_cache
+import hashlib
 import logging
+import threading
+import time
+import httpx
+import numpy as np
+import tiktoken
+from cachetools import TTLCache, cached
 from sqlalchemy.orm import Session
 from sqlalchemy import text
 from openai import OpenAI
+from pgvector.utils import HalfVector
 from config import settings
 from models import AcademicSource
 
-# Initialize OpenAI client
-client = OpenAI(api_key=settings.OPENAI_API_KEY)
+# Initialize OpenAI client with a warm keep-alive pool and a bounded timeout;
+# HTTP/2 multiplexes concurrent embedding calls over the pooled connections
+client = OpenAI(
+    api_key=settings.OPENAI_API_KEY,
+    http_client=httpx.Client(
+        http2=True,
+        limits=httpx.Limits(max_connections=64, max_keepalive_connections=32, keepalive_expiry=60),
+        timeout=httpx.Timeout(15.0, connect=3.0)
+    )
+)
 
 # Set up logging
 logger = logging.getLogger(__name__)
 
+# HNSW candidate list size per search (pgvector default is 40; higher = better recall)
+HNSW_EF_SEARCH = 40
+# HNSW returns at most ef_search rows; pgvector accepts 1..1000
+HNSW_EF_SEARCH_MAX = 1000
+
+
+def _ef_search(rows_needed: int) -> int:
+    """ef_search large enough for the scan to return rows_needed rows."""
+    return min(max(HNSW_EF_SEARCH, rows_needed), HNSW_EF_SEARCH_MAX)
+
+
+# Token limits for embedding calls (the API caps an input, and a request, at
+# 8191 tokens for ada-002; stay a little under it)
+EMBEDDING_MAX_TOKENS = 8000
+EMBEDDING_BATCH_MAX_INPUTS = 100
+EMBEDDING_BATCH_MAX_TOKENS = 8000
+
+# Server-side prepared statement for the vector search, created once per
+# connection so Postgres parses and plans it once instead of on every query.
+# The distance is computed once in the subquery; its ORDER BY must stay the
+# bare `embedding <#> halfvec` form for the HNSW index to be used. Embeddings
+# are unit length, so the inner product equals cosine similarity; `<#>`
+# returns the negated inner product. Only the skeleton (id, title, score) is
+# returned; see hydrate_sources for the remaining columns.
+SEARCH_STATEMENT = "search_similar_sources"
+# Result columns of the search statement, in order
+_COLS = ("id", "title", "similarity")
+PREPARE_SEARCH_SQL = f"""
+    PREPARE {SEARCH_STATEMENT}(halfvec, integer) AS
+    SELECT 
+        id,
+        title,
+        -distance as similarity
+    FROM (
+        SELECT 
+            id,
+            title,
+            embedding <#> $1 as distance
+        FROM academic_sources
+        WHERE embedding IS NOT NULL
+        ORDER BY embedding <#> $1
+        LIMIT $2
+    ) sub
+    ORDER BY distance
+"""
+
+# With metadata filters ($3 = minimum publication year, $4 = source type, NULL
+# = no filter) the HNSW scan over-fetches $5 candidates and the filters are
+# applied to those
+FILTERED_SEARCH_STATEMENT = "search_similar_sources_filtered"
+PREPARE_FILTERED_SEARCH_SQL = f"""
+    PREPARE {FILTERED_SEARCH_STATEMENT}(halfvec, integer, integer, text, integer) AS
+    SELECT 
+        id,
+        title,
+        -distance as similarity
+    FROM (
+        SELECT 
+            id,
+            title,
+            publication_year,
+            source_type,
+            embedding <#> $1 as distance
+        FROM academic_sources
+        WHERE embedding IS NOT NULL
+        ORDER BY embedding <#> $1
+        LIMIT $5
+    ) sub
+    WHERE ($3::integer IS NULL OR publication_year >= $3)
+      AND ($4::text IS NULL OR source_type = $4)
+    ORDER BY distance
+    LIMIT $2
+"""
+
+# Exact search for selective filters that leave too few of the over-fetched
+# candidates: the b-tree indexes find the matching rows and only those are
+# ranked (MATERIALIZED keeps the HNSW index out of this plan)
+EXACT_SEARCH_STATEMENT = "search_similar_sources_exact"
+PREPARE_EXACT_SEARCH_SQL = f"""
+    PREPARE {EXACT_SEARCH_STATEMENT}(halfvec, integer, integer, text) AS
+    WITH filtered AS MATERIALIZED (
+        SELECT id, title, embedding
+        FROM academic_sources
+        WHERE embedding IS NOT NULL
+          AND ($3::integer IS NULL OR publication_year >= $3)
+          AND ($4::text IS NULL OR source_type = $4)
+    )
+    SELECT 
+        id,
+        title,
+        -distance as similarity
+    FROM (
+        SELECT id, title, embedding <#> $1 as distance
+        FROM filtered
+    ) sub
+    ORDER BY distance
+    LIMIT $2
+"""
+
+# Candidates fetched per requested result when filters are applied
+SEARCH_OVERFETCH = 5
+
+# Columns filled in by hydrate_sources, and their cache (sources rarely change)
+_DETAIL_COLS = ("id", "authors", "publication_year", "abstract", "source_type", "url")
+_details_cache = TTLCache(maxsize=10000, ttl=3600)
+_details_cache_lock = threading.Lock()
+
+# Search results for repeated queries, so they skip both the OpenAI
+# embedding call and the vector search
+SEARCH_CACHE_TTL = 3600
+_search_cache = TTLCache(maxsize=5000, ttl=SEARCH_CACHE_TTL)
+
+
+# Near-duplicate queries (cosine similarity of the query embeddings at or
+# above the threshold) reuse an earlier result set and skip the vector search
+SEMANTIC_CACHE_THRESHOLD = 0.97
+SEMANTIC_CACHE_SIZE = 1024
+
+
+class _SemanticCache:
+    """FIFO of unit-normalized query embeddings and their search results.
+    
+    Entries only match lookups with the same search parameters (top_k and
+    filters), compared by hash, and expire after ttl seconds like the exact
+    search cache, so newly loaded sources show up.
+    """
+    
+    def __init__(self, size: int, dimension: int, threshold: float, ttl: float):
+        self.threshold = threshold
+        self.ttl = ttl
+        self._embeddings = np.zeros((size, dimension), dtype=np.float32)
+        self._params = np.zeros(size, dtype=np.int64)
+        self._stored_at = np.zeros(size, dtype=np.float64)
+        self._results: List[Optional[List[Dict]]] = [None] * size
+        self._count = 0
+        self._next = 0
+        self._lock = threading.Lock()
+    
+    def get(self, query: np.ndarray, params: tuple) -> Optional[List[Dict]]:
+        with self._lock:
+            if not self._count:
+                return None
+            sims = self._embeddings[:self._count] @ query
+            sims[self._params[:self._count] != hash(params)] = -1.0
+            sims[self._stored_at[:self._count] < time.monotonic() - self.ttl] = -1.0
+            best = int(sims.argmax())
+            if sims[best] >= self.threshold:
+                return self._results[best]
+            return None
+    
+    def put(self, query: np.ndarray, params: tuple, results: List[Dict]) -> None:
+        with self._lock:
+            slot = self._next
+            self._embeddings[slot] = query
+            self._params[slot] = hash(params)
+            self._stored_at[slot] = time.monotonic()
+            self._results[slot] = results
+            self._next = (slot + 1) % len(self._results)
+            self._count = min(self._count + 1, len(self._results))
+
+
+_semantic_cache = _SemanticCache(
+    SEMANTIC_CACHE_SIZE, settings.VECTOR_DIMENSION, SEMANTIC_CACHE_THRESHOLD, SEARCH_CACHE_TTL
+)
+
+
+def _search_cache_key(
+    db: Session,
+    query_text: str,
+    top_k: int = 5,
+    threshold: float = 0.5,
+    min_year: Optional[int] = None,
+    source_type: Optional[str] = None
+):
+    """Cache key for search_similar_sources (ignores the session)."""
+    normalized = query_text.strip().lower().encode('utf-8')
+    digest = hashlib.blake2b(normalized, digest_size=16).hexdigest()
+    return digest, top_k, threshold, min_year, source_type
+
+
+def _execute_prepared(raw_conn, cursor, name: str, prepare_sql: str, params: tuple) -> List[tuple]:
+    """EXECUTE a prepared statement, PREPAREing it on first use per connection.
+    
+    The pooled connection's info dict lives as long as the physical connection.
+    """
+    if name not in raw_conn.info:
+        cursor.execute(prepare_sql)
+        raw_conn.info[name] = True
+    placeholders = ", ".join(["%s"] * len(params))
+    cursor.execute(f"EXECUTE {name}({placeholders})", params)
+    return cursor.fetchall()
+
+
+# Embeddings shared across processes and restarts through Redis, stored as
+# float16 bytes
+EMBEDDING_CACHE_TTL = 30 * 24 * 3600
+
+
+@lru_cache(maxsize=1)
+def _redis():
+    """Redis client for the embedding cache, or None when REDIS_URL is not set."""
+    if not settings.REDIS_URL:
+        return None
+    
+    # Only needed when the embedding cache is enabled
+    import redis
+    
+    return redis.Redis.from_url(settings.REDIS_URL, socket_timeout=0.5)
+
+
+def _embedding_cache_key(text: str) -> str:
+    return hashlib.sha256(f"{settings.EMBEDDING_MODEL}:{text}".encode('utf-8')).hexdigest()
+
+
+def _get_cached_embedding(text: str) -> Optional[List[float]]:
+    cache = _redis()
+    if cache is None:
+        return None
+    try:
+        value = cache.get(_embedding_cache_key(text))
+    except Exception as e:
+        # The cache is an optimization; fall through to the API
+        logger.warning(f"Embedding cache unavailable: {str(e)}")
+        return None
+    if value is None:
+        return None
+    return np.frombuffer(value, dtype=np.float16).astype(np.float32).tolist()
+
+
+def _set_cached_embedding(text: str, embedding: List[float]) -> None:
+    cache = _redis()
+    if cache is None:
+        return
+    try:
+        cache.setex(
+            _embedding_cache_key(text),
+            EMBEDDING_CACHE_TTL,
+            np.asarray(embedding, dtype=np.float16).tobytes()
+        )
+    except Exception as e:
+        logger.warning(f"Embedding cache unavailable: {str(e)}")
+
+
+@lru_cache(maxsize=1)
+def _encoding() -> Optional[tiktoken.Encoding]:
+    """Tokenizer for the embedding model, loaded once on first use.
+    
+    The BPE file is baked into the Docker image (TIKTOKEN_CACHE_DIR); if it
+    can't be loaded (e.g. no cache and no egress), None is cached so requests
+    go out untruncated instead of retrying the download on every call.
+    """
+    try:
+        try:
+            return tiktoken.encoding_for_model(settings.EMBEDDING_MODEL)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning(f"tiktoken encoding unavailable, embedding inputs won't be truncated: {str(e)}")
+        return None
+
+
+def _truncate(text: str, max_tokens: int = EMBEDDING_MAX_TOKENS) -> str:
+    """Cut text to max_tokens so the embedding request never exceeds the limit."""
+    encoding = _encoding()
+    if encoding is None:
+        return text
+    tokens = encoding.encode(text)
+    return encoding.decode(tokens[:max_tokens]) if len(tokens) > max_tokens else text
+
+
+@lru_cache(maxsize=1)
+def _local_model():
+    """sentence-transformers model for USE_LOCAL_EMBEDDING, loaded once."""
+    if not settings.LOCAL_EMBEDDING_MODEL:
+        raise Exception("LOCAL_EMBEDDING_MODEL is not set. Please configure it in your .env file.")
+    
+    # Only needed when local embeddings are enabled
+    from sentence_transformers import SentenceTransformer
+    
+    # Picks CUDA automatically when available
+    model = SentenceTransformer(settings.LOCAL_EMBEDDING_MODEL)
+    dimension = model.get_sentence_embedding_dimension()
+    if dimension != settings.VECTOR_DIMENSION:
+        raise Exception(
+            f"{settings.LOCAL_EMBEDDING_MODEL} produces {dimension}-dim embeddings, "
+            f"expected {settings.VECTOR_DIMENSION}"
+        )
+    return model
+
+
+def generate_local_embeddings(texts: List[str]) -> List[List[float]]:
+    """Embed texts with the local model, unit-normalized like OpenAI embeddings."""
+    try:
+        embeddings = _local_model().encode(
+            texts,
+            batch_size=64,
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        )
+        return embeddings.tolist()
+    except Exception as e:
+        raise Exception(f"Error generating local embeddings: {str(e)}")
+
 
 def generate_embedding(text: str) -> List[float]:
-    """Generate embedding for text using OpenAI."""
+    """Generate embedding for text using OpenAI (or the Redis cache, if enabled)."""
+    if settings.USE_LOCAL_EMBEDDING:
+        return generate_local_embeddings([text])[0]
+    
+    cached_embedding = _get_cached_embedding(text)
+    if cached_embedding is not None:
+        return cached_embedding
+    
     try:
         if not settings.OPENAI_API_KEY or settings.OPENAI_API_KEY == "":
             raise Exception("OPENAI_API_KEY is not set. Please configure it in your .env file.")
         
         response = client.embeddings.create(
             model=settings.EMBEDDING_MODEL,
-            input=text
+            input=_truncate(text)
         )
-        return response.data[0].embedding
+        embedding = response.data[0].embedding
     except Exception as e:
         error_msg = str(e)
         if "API key" in error_msg or "OPENAI_API_KEY" in error_msg:
             raise Exception(f"OpenAI API key not configured: {error_msg}")
         raise Exception(f"Error generating embedding: {error_msg}")
+    
+    _set_cached_embedding(text, embedding)
+    return embedding
+
+
+def embeddings_from_response(response) -> List[List[float]]:
+    """Embeddings of a batched embeddings.create response, in input order."""
+    # The API returns one item per input, tagged with its input index
+    return [item.embedding for item in sorted(response.data, key=lambda d: d.index)]
+
+
+def pack_embedding_batches(texts: List[str]) -> List[List[str]]:
+    """Split texts into embedding requests, preserving order.
+    
+    Each batch holds at most EMBEDDING_BATCH_MAX_INPUTS inputs and
+    EMBEDDING_BATCH_MAX_TOKENS tokens; longer texts are truncated to
+    EMBEDDING_MAX_TOKENS. Without a tokenizer, tokens are estimated
+    conservatively from the text length and nothing is truncated.
+    """
+    encoding = _encoding()
+    
+    batches: List[List[str]] = []
+    batch: List[str] = []
+    batch_tokens = 0
+    for item in texts:
+        if encoding is None:
+            tokens = len(item) // 3 + 1
+        else:
+            token_ids = encoding.encode(item)
+            if len(token_ids) > EMBEDDING_MAX_TOKENS:
+                token_ids = token_ids[:EMBEDDING_MAX_TOKENS]
+                item = encoding.decode(token_ids)
+            tokens = len(token_ids)
+        if batch and (len(batch) >= EMBEDDING_BATCH_MAX_INPUTS
+                      or batch_tokens + tokens > EMBEDDING_BATCH_MAX_TOKENS):
+            batches.append(batch)
+            batch, batch_tokens = [], 0
+        batch.append(item)
+        batch_tokens += tokens
+    if batch:
+        batches.append(batch)
+    
+    return batches
+
+
+@lru_cache(maxsize=4096)
+def _embed_query_cached(normalized_query: str) -> np.ndarray:
+    # float32 array: ~6 KB per entry instead of ~49 KB for a tuple of floats
+    embedding = np.asarray(generate_embedding(normalized_query), dtype=np.float32)
+    embedding.flags.writeable = False  # shared by every caller
+    return embedding
 
 
+def generate_query_embedding(query_text: str) -> np.ndarray:
+    """Generate the embedding for a search query, cached per normalized query.
+    
+    Returns a read-only float32 array shared with the cache.
+    """
+    return _embed_query_cached(query_text.strip().lower())
+
+
+@cached(_search_cache, key=_search_cache_key, lock=threading.Lock())
 def search_similar_sources(
     db: Session,
     query_text: str,
     top_k: int = 5,
-    threshold: float = 0.5  # Lowered from 0.7 to 0.5 for better recall
+    threshold: float = 0.5,  # Lowered from 0.7 to 0.5 for better recall
+    min_year: Optional[int] = None,
+    source_type: Optional[str] = None
 ) -> List[Dict]:
     """Search for similar academic sources using vector similarity.
     
@@ -49,109 +438,88 @@ def search_similar_sources(
         query_text: The search query text
         top_k: Number of top results to return
         threshold: Minimum similarity score (0.0-1.0). Lower values return more results.
+        min_year: Only sources published in or after this year
+        source_type: Only sources of this type ('paper', 'textbook', 'course_material')
     
     Returns:
-        List of source dictionaries with similarity scores, ordered by relevance
+        List of source dictionaries (id, title, similarity, relevance), ordered
+        by relevance; use hydrate_sources for authors, abstract, etc.
+        Results are cached per normalized query for an hour, and near-duplicate
+        queries reuse the results of an earlier, semantically equivalent one.
     """
     try:
-        # Log the query for debugging
-        logger.info(f"Searching for query: '{query_text}'")
-        
-        # Check if there are any sources in the database
-        source_count = db.query(AcademicSource).count()
-        if source_count == 0:
-            raise Exception("No academic sources found in database. Please load sample sources from data/sample_academic_sources.json")
-        
-        logger.info(f"Found {source_count} sources in database")
+        debug = logger.isEnabledFor(logging.DEBUG)
         
         # Generate embedding for query - this MUST be called with the actual query_text
         # Note: Sources are embedded using "title + abstract", so the query should
         # be semantically similar to what users would search for in academic contexts
-        logger.info(f"Generating embedding for query: '{query_text[:50]}...'")
-        query_embedding = generate_embedding(query_text)
-        logger.info(f"Generated embedding with {len(query_embedding)} dimensions")
+        query_embedding = generate_query_embedding(query_text)
+        if debug:
+            logger.debug("Query %r -> embedding (%d dims), first values: %s",
+                         query_text[:50], len(query_embedding), query_embedding[:3])
         
-        # Verify embedding is different (check first few values)
-        embedding_sample = query_embedding[:5]
-        logger.info(f"Embedding sample (first 5 values): {embedding_sample}")
+        # The query vector is bound as a parameter (a HalfVector), so the
+        # SQL text stays the same for every query
+        query_vector = np.asarray(query_embedding, dtype=np.float32)
         
-        # CRITICAL FIX: Convert to string format that PostgreSQL can parse directly
-        # This avoids any issues with parameter binding
-        from pgvector.psycopg2 import register_vector
+        query_unit = query_vector / np.linalg.norm(query_vector)
+        search_params = (top_k, min_year, source_type)
+        cached_sources = _semantic_cache.get(query_unit, search_params)
+        if cached_sources is not None:
+            if debug:
+                logger.debug("Semantic cache hit for query %r", query_text[:50])
+            return cached_sources
         
-        # Get raw psycopg2 connection
+        # Get raw psycopg2 connection (pgvector types are registered on connect,
+        # see database.py)
         raw_conn = db.connection().connection
         
-        # Register vector type adapter
-        register_vector(raw_conn)
-        
-        # Log embedding details to verify it's different for different queries
-        import hashlib
-        embedding_sample = str(query_embedding[:5])
-        embedding_hash = hashlib.md5(embedding_sample.encode()).hexdigest()[:8]
-        logger.info(f"Query: '{query_text}' -> Embedding hash: {embedding_hash}, First 3 values: {query_embedding[:3]}")
-        
-        # Convert to string format that pgvector can parse: [0.1,0.2,0.3,...]
-        embedding_str = "[" + ",".join(str(x) for x in query_embedding) + "]"
+        # Bound as pgvector's HalfVector, so the registered adapter sends a
+        # halfvec literal the server parses straight into the column's FP16 type
+        query_literal = HalfVector(query_unit)
         
-        # Create a fresh cursor for this query - IMPORTANT: new cursor each time
-        cursor = raw_conn.cursor()
+        with raw_conn.cursor() as cursor:
+            if min_year is None and source_type is None:
+                # Scoped to this transaction only
+                cursor.execute("SET LOCAL hnsw.ef_search = %s", (_ef_search(top_k),))
+                rows = _execute_prepared(
+                    raw_conn, cursor, SEARCH_STATEMENT, PREPARE_SEARCH_SQL,
+                    (query_literal, top_k)
+                )
+            else:
+                # Raise ef_search to the over-fetch size (clamped; the exact
+                # fallback below covers a clamped scan that comes up short)
+                candidates = top_k * SEARCH_OVERFETCH
+                cursor.execute("SET LOCAL hnsw.ef_search = %s", (_ef_search(candidates),))
+                rows = _execute_prepared(
+                    raw_conn, cursor, FILTERED_SEARCH_STATEMENT, PREPARE_FILTERED_SEARCH_SQL,
+                    (query_literal, top_k, min_year, source_type, candidates)
+                )
+                if len(rows) < top_k:
+                    rows = _execute_prepared(
+                        raw_conn, cursor, EXACT_SEARCH_STATEMENT, PREPARE_EXACT_SEARCH_SQL,
+                        (query_literal, top_k, min_year, source_type)
+                    )
         
-        # Use f-string to embed the vector directly in the query
-        # This ensures the query is completely fresh each time with no parameter caching
-        # We use parameterized query for top_k to prevent SQL injection
-        sql_query = f"""
-            SELECT 
-                id,
-                title,
-                authors,
-                publication_year,
-                abstract,
-                source_type,
-                url,
-                1 - (embedding <=> '{embedding_str}'::vector) as similarity
-            FROM academic_sources
-            WHERE embedding IS NOT NULL
-            ORDER BY embedding <=> '{embedding_str}'::vector
-            LIMIT %s
-        """
+        logger.info("search top_k=%d hits=%d", top_k, len(rows))
+        if debug:
+            for i, row in enumerate(rows[:3]):  # Log first 3 results
+                logger.debug("  Result %d: id=%s, title=%.40s, similarity=%.4f",
+                             i + 1, row[0], row[1] or "N/A", row[2])
         
-        # Execute with only top_k as parameter - embedding is embedded in SQL
-        # This completely avoids any parameter binding issues
-        logger.info(f"Executing vector search query with embedding_hash={embedding_hash}")
-        logger.info(f"SQL query preview (first 200 chars): {sql_query[:200]}...")
-        
-        cursor.execute(sql_query, (top_k,))
-        rows = cursor.fetchall()
-        
-        logger.info(f"Query returned {len(rows)} rows")
-        for i, row in enumerate(rows[:3]):  # Log first 3 results
-            logger.info(f"  Result {i+1}: id={row[0]}, title={row[1][:40] if row[1] else 'N/A'}..., similarity={row[7]:.4f}")
-        
-        cursor.close()
+        # Only an empty result needs the (full scan) emptiness check
+        if not rows and db.query(AcademicSource).count() == 0:
+            raise Exception("No academic sources found in database. Please load sample sources from data/sample_academic_sources.json")
         
-        sources = []
-        for row in rows:
-            similarity = float(row[7])  # similarity is the 8th column (0-indexed: 7)
-            
-            # Return all top_k results ordered by similarity
-            # The threshold is advisory - we return the best matches available
-            # Users can see the similarity score to judge relevance
-            source_dict = {
-                "id": row[0],
-                "title": row[1],
-                "authors": row[2],
-                "publication_year": row[3],
-                "abstract": row[4],
-                "source_type": row[5],
-                "url": row[6],
-                "relevance": f"Relevance score: {similarity:.2%}",
-                "similarity": similarity
-            }
-            sources.append(source_dict)
-            logger.info(f"Found source: {row[1][:50] if row[1] else 'N/A'}... (similarity: {similarity:.4f})")
+        # Return all top_k results ordered by similarity
+        # The threshold is advisory - we return the best matches available
+        # Users can see the similarity score to judge relevance
+        sources = [dict(zip(_COLS, row)) for row in rows]
+        for source in sources:
+            similarity = source["similarity"] = float(source["similarity"])
+            source["relevance"] = f"Relevance score: {similarity:.2%}"
         
-        logger.info(f"Returning {len(sources)} sources for query: '{query_text}'")
+        _semantic_cache.put(query_unit, search_params, sources)
         return sources
     
     except Exception as e:
@@ -159,6 +527,34 @@ def search_similar_sources(
         raise Exception(f"Error searching sources: {str(e)}")
 
 
+def hydrate_sources(db: Session, ids: List[int]) -> Dict[int, Dict]:
+    """Fetch the detail columns (authors, year, abstract, type, url) for sources.
+    
+    Returns a dict keyed by source id; ids that no longer exist are omitted.
+    """
+    with _details_cache_lock:
+        details = {source_id: _details_cache[source_id] for source_id in ids if source_id in _details_cache}
+    missing = [source_id for source_id in ids if source_id not in details]
+    if not missing:
+        return details
+    
+    try:
+        with db.connection().connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT {', '.join(_DETAIL_COLS)} FROM academic_sources WHERE id = ANY(%s)",
+                (missing,)
+            )
+            rows = cursor.fetchall()
+    except Exception as e:
+        raise Exception(f"Error fetching source details: {str(e)}")
+    
+    fetched = {row[0]: dict(zip(_DETAIL_COLS, row)) for row in rows}
+    with _details_cache_lock:
+        _details_cache.update(fetched)
+    details.update(fetched)
+    return details
+
+
 def add_academic_source(
     db: Session,
     title: str,
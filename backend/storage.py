@@ -0,0 +1,38 @@
+import hashlib
+from typing import Optional, Tuple
+from config import settings
+
+
+def text_sha256(text: str) -> str:
+    """SHA-256 fingerprint of extracted assignment text."""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+async def store_assignment_text(text: str) -> Tuple[str, Optional[str]]:
+    """Fingerprint assignment text and upload it to object storage.
+    
+    Returns (sha256, object_key). When ASSIGNMENT_TEXT_BUCKET is not configured
+    nothing is uploaded and object_key is None, so the caller keeps the text
+    in the database instead.
+    """
+    digest = text_sha256(text)
+    if not settings.ASSIGNMENT_TEXT_BUCKET:
+        return digest, None
+    
+    # Only needed when object storage is enabled
+    import aioboto3
+    
+    key = f"{digest}.txt"
+    try:
+        session = aioboto3.Session()
+        async with session.client("s3", endpoint_url=settings.S3_ENDPOINT_URL) as s3:
+            await s3.put_object(
+                Bucket=settings.ASSIGNMENT_TEXT_BUCKET,
+                Key=key,
+                Body=text.encode('utf-8'),
+                ContentType="text/plain; charset=utf-8"
+            )
+    except Exception as e:
+        raise Exception(f"Error storing assignment text: {str(e)}")
+    
+    return digest, key
@@ -0,0 +1,110 @@
+"""Load data/sample_academic_sources.json into the academic_sources table.
+
+Usage (from the repository root, with the database reachable and
+OPENAI_API_KEY set):
+
+    python data/load_sample_sources.py [path/to/sources.json]
+"""
+import asyncio
+import json
+import os
+import sys
+from typing import List
+
+from openai import AsyncOpenAI
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(DATA_DIR, "..", "backend"))
+
+# Shares the backend's pooled sync engine, including its connect hook that
+# registers the pgvector types once per connection
+from config import settings  # noqa: E402
+from database import SessionLocal, engine  # noqa: E402
+from models import AcademicSource  # noqa: E402
+from rag_service import embeddings_from_response, generate_local_embeddings, pack_embedding_batches  # noqa: E402
+
+DEFAULT_SOURCES_FILE = os.path.join(DATA_DIR, "sample_academic_sources.json")
+
+# Embedding requests in flight at once
+EMBEDDING_CONCURRENCY = 5
+
+# Idempotent schema upgrade (halfvec column, search indexes), so sources can
+# be loaded into databases created from an older init.sql
+UPGRADE_SQL_FILE = os.path.join(DATA_DIR, "..", "init_db", "upgrade.sql")
+
+
+async def embed_texts(texts: List[str]) -> List[List[float]]:
+    """Embed texts in token-packed batches, several requests at a time."""
+    client = AsyncOpenAI(api_key=settings.OPENAI_API_KEY)
+    semaphore = asyncio.Semaphore(EMBEDDING_CONCURRENCY)
+    
+    async def embed_batch(batch: List[str]) -> List[List[float]]:
+        async with semaphore:
+            response = await client.embeddings.create(
+                model=settings.EMBEDDING_MODEL,
+                input=batch
+            )
+        return embeddings_from_response(response)
+    
+    try:
+        results = await asyncio.gather(*(embed_batch(batch) for batch in pack_embedding_batches(texts)))
+    finally:
+        await client.close()
+    
+    return [embedding for batch in results for embedding in batch]
+
+
+def load_sources(path: str = DEFAULT_SOURCES_FILE) -> int:
+    """Embed every source in ``path`` and insert them in a single transaction."""
+    with open(path, encoding="utf-8") as f:
+        sources = json.load(f)
+    
+    # Same text add_academic_source embeds: title + abstract
+    texts = [
+        f"{source['title']} {source['abstract']}" if source.get("abstract") else source["title"]
+        for source in sources
+    ]
+    if settings.USE_LOCAL_EMBEDDING:
+        # One batched local encode instead of API round-trips
+        embeddings = generate_local_embeddings(texts)
+    else:
+        embeddings = asyncio.run(embed_texts(texts))
+    
+    with open(UPGRADE_SQL_FILE, encoding="utf-8") as f:
+        upgrade_sql = f.read()
+    
+    db = SessionLocal()
+    try:
+        # The column must be halfvec before rows are inserted
+        db.connection().exec_driver_sql(upgrade_sql)
+        
+        # Core executemany: one INSERT statement for all rows, no ORM objects
+        db.execute(AcademicSource.__table__.insert(), [
+            {
+                "title": source["title"],
+                "authors": source.get("authors"),
+                "publication_year": source.get("publication_year"),
+                "abstract": source.get("abstract"),
+                "full_text": source.get("full_text"),
+                "source_type": source.get("source_type", "paper"),
+                "url": source.get("url"),
+                "embedding": embedding
+            }
+            for source, embedding in zip(sources, embeddings)
+        ])
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    
+    return len(sources)
+
+
+if __name__ == "__main__":
+    try:
+        count = load_sources(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_SOURCES_FILE)
+    finally:
+        engine.dispose()
+    print(f"✅ Loaded {count} academic sources")
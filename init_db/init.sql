@@ -17,9 +17,13 @@ CREATE TABLE IF NOT EXISTS assignments (
     student_id INTEGER REFERENCES students(id) ON DELETE CASCADE,
     filename TEXT NOT NULL,
     original_text TEXT,
+    text_sha256 VARCHAR(64),
+    text_s3_key TEXT,
+    content_sha256 VARCHAR(64),
     topic TEXT,
     academic_level TEXT,
     word_count INTEGER,
+    status TEXT DEFAULT 'pending',
     uploaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
@@ -47,14 +51,20 @@ CREATE TABLE IF NOT EXISTS academic_sources (
     full_text TEXT,
     source_type TEXT CHECK (source_type IN ('paper', 'textbook', 'course_material')),
     url TEXT,
-    embedding VECTOR(1536),
+    embedding HALFVEC(1536),
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
--- Create index for vector similarity search
-CREATE INDEX IF NOT EXISTS academic_sources_embedding_idx ON academic_sources 
-USING ivfflat (embedding vector_cosine_ops)
-WITH (lists = 100);
+-- Create index for vector similarity search (HNSW: no training step, so it
+-- works on an initially empty table, unlike ivfflat). Embeddings are unit
+-- length, so inner product ranks like cosine without the norm computations.
+CREATE INDEX IF NOT EXISTS academic_sources_embedding_hnsw_ip_idx ON academic_sources 
+USING hnsw (embedding halfvec_ip_ops)
+WITH (m = 16, ef_construction = 64);
+
+-- Create indexes for the metadata filters of the source search
+CREATE INDEX IF NOT EXISTS academic_sources_publication_year_idx ON academic_sources(publication_year);
+CREATE INDEX IF NOT EXISTS academic_sources_source_type_idx ON academic_sources(source_type);
 
 -- Create index for text search
 CREATE INDEX IF NOT EXISTS academic_sources_title_idx ON academic_sources USING gin(to_tsvector('english', title));
@@ -62,8 +72,12 @@ CREATE INDEX IF NOT EXISTS academic_sources_abstract_idx ON academic_sources USI
 
 -- Create indexes for performance
 CREATE INDEX IF NOT EXISTS assignments_student_id_idx ON assignments(student_id);
+CREATE INDEX IF NOT EXISTS assignments_text_sha256_idx ON assignments(text_sha256);
+CREATE INDEX IF NOT EXISTS assignments_content_sha256_idx ON assignments(content_sha256);
 CREATE INDEX IF NOT EXISTS analysis_results_assignment_id_idx ON analysis_results(assignment_id);
+CREATE INDEX IF NOT EXISTS analysis_results_assignment_analyzed_idx ON analysis_results(assignment_id, analyzed_at DESC);
 CREATE INDEX IF NOT EXISTS students_email_idx ON students(email);
+CREATE INDEX IF NOT EXISTS students_email_lower_idx ON students USING hash (lower(email));
 CREATE INDEX IF NOT EXISTS students_student_id_idx ON students(student_id);
 
 -- Insert sample student for testing (password: test123)
@@ -0,0 +1,41 @@
+-- Upgrade a database created from an older init.sql to the current schema.
+-- init.sql only runs on a fresh volume, so apply this to existing ones:
+--   docker-compose exec -T postgres psql -U student -d academic_helper < init_db/upgrade.sql
+-- Every statement is idempotent (and a no-op right after init.sql).
+
+-- Assignment text fingerprint / object storage key, upload fingerprint and
+-- background processing status
+ALTER TABLE assignments ADD COLUMN IF NOT EXISTS text_sha256 VARCHAR(64);
+ALTER TABLE assignments ADD COLUMN IF NOT EXISTS text_s3_key TEXT;
+ALTER TABLE assignments ADD COLUMN IF NOT EXISTS content_sha256 VARCHAR(64);
+ALTER TABLE assignments ADD COLUMN IF NOT EXISTS status TEXT DEFAULT 'pending';
+
+-- Indexes added after the initial schema
+CREATE INDEX IF NOT EXISTS assignments_text_sha256_idx ON assignments(text_sha256);
+CREATE INDEX IF NOT EXISTS assignments_content_sha256_idx ON assignments(content_sha256);
+CREATE INDEX IF NOT EXISTS analysis_results_assignment_analyzed_idx ON analysis_results(assignment_id, analyzed_at DESC);
+CREATE INDEX IF NOT EXISTS students_email_lower_idx ON students USING hash (lower(email));
+
+-- Source embeddings moved from vector(1536) to halfvec(1536) (FP16). The old
+-- ivfflat/HNSW indexes use vector operator classes, so drop them first.
+DO $$
+BEGIN
+    IF (SELECT format_type(atttypid, atttypmod) FROM pg_attribute
+        WHERE attrelid = 'academic_sources'::regclass AND attname = 'embedding') = 'vector(1536)' THEN
+        DROP INDEX IF EXISTS academic_sources_embedding_idx;
+        DROP INDEX IF EXISTS academic_sources_embedding_hnsw_idx;
+        ALTER TABLE academic_sources
+            ALTER COLUMN embedding TYPE halfvec(1536) USING embedding::halfvec(1536);
+    END IF;
+END $$;
+
+-- Vector index matching the `<#>` (inner product) search; replaces the
+-- earlier cosine index
+DROP INDEX IF EXISTS academic_sources_embedding_hnsw_idx;
+CREATE INDEX IF NOT EXISTS academic_sources_embedding_hnsw_ip_idx ON academic_sources 
+USING hnsw (embedding halfvec_ip_ops)
+WITH (m = 16, ef_construction = 64);
+
+-- Metadata filters of the source search
+CREATE INDEX IF NOT EXISTS academic_sources_publication_year_idx ON academic_sources(publication_year);
+CREATE INDEX IF NOT EXISTS academic_sources_source_type_idx ON academic_sources(source_type);